@@ -1,7 +1,178 @@
-from collections import Counter, defaultdict, deque
+from collections import defaultdict
 import time
 import os
 import functools
+import itertools
+import concurrent.futures
+
+# Packed letter counts use one 8-bit lane per letter. Setting the top bit of every lane
+# on the larger side of a subtraction turns "a <= b in every lane" into one int subtract:
+# a lane that borrows clears its guard bit, the others leave it set.
+GUARD_MASK = int.from_bytes(b'\x80' * 26, 'little')
+LANE_MAX = 0x7f
+# Adding LANE_MAX to every lane carries into the guard bit exactly for the non-zero lanes,
+# so ((packed + LANE_FILL) & GUARD_MASK) marks which letters are present
+LANE_FILL = int.from_bytes(b'\x7f' * 26, 'little')
+
+# Most search states remembered for deduplication before the oldest ones are dropped
+SEEN_STATES_LIMIT = 1 << 18
+# Most distinct rack letters for which walking the submasks of the rack's letter mask beats
+# scanning every mask in the dictionary; the walk costs 2 ** (distinct letters) lookups
+SUBMASK_WALK_LIMIT = 15
+# Lane increment and mask bit for each character code, so a word packs in one pass
+LETTER_LANES = [0] * 97 + [1 << (8 * i) for i in range(26)]
+LETTER_BITS = [0] * 97 + [1 << i for i in range(26)]
+# Most solutions find_all_solutions reports for a rack
+MAX_REPORTED_SOLUTIONS = 20
+# Most racks whose solutions each solver keeps cached
+SOLUTION_CACHE_SIZE = 256
+
+
+def pack_letters(word):
+    """Pack the letter counts of a word and build its letter mask in a single pass.
+    
+    Args:
+        word: Lowercase a-z word
+        
+    Returns:
+        Tuple of the packed letter counts and the letter mask
+    """
+    packed = 0
+    mask = 0
+    # Iterating the encoded bytes yields the character codes directly, skipping ord()
+    for code in word.encode():
+        packed += LETTER_LANES[code]
+        mask |= LETTER_BITS[code]
+    return packed, mask
+
+
+def pack_counts(counts):
+    """Pack a 26-slot count vector into a single int, one 8-bit lane per letter.
+    
+    Args:
+        counts: Sequence of 26 letter counts, each below 128
+        
+    Returns:
+        Int holding the counts in consecutive 8-bit lanes
+    """
+    # Lanes are a byte wide, so the count vector is exactly the little-endian bytes
+    return int.from_bytes(bytes(counts), 'little')
+
+
+def counts_fit(packed, available):
+    """Check whether packed letter counts fit within another set of packed counts.
+    
+    Args:
+        packed: Packed letter counts that are needed
+        available: Packed letter counts on hand, each below 128
+        
+    Returns:
+        True if no letter is needed more often than it is available
+    """
+    return ((available | GUARD_MASK) - packed) & GUARD_MASK == GUARD_MASK
+
+
+def letter_mask(word):
+    """Build a bitmask of the distinct letters in a word.
+    
+    Args:
+        word: Lowercase word
+        
+    Returns:
+        Int with bit i set if the i-th letter of the alphabet is present
+    """
+    mask = 0
+    for letter in set(word):
+        mask |= 1 << (ord(letter) - 97)
+    return mask
+
+
+def mask_letters(mask):
+    """Yield the letters whose bits are set in a letter mask, in alphabetical order.
+    
+    Args:
+        mask: Int built by letter_mask (or an AND of such masks)
+        
+    Yields:
+        One lowercase letter per set bit
+    """
+    while mask:
+        bit = mask & -mask
+        yield chr(96 + bit.bit_length())
+        mask ^= bit
+
+
+def masks_connected(masks):
+    """Check if words given by their letter masks are all connected through shared letters.
+    
+    Args:
+        masks: Non-empty sequence of letter masks (or any ints whose bits stand for letters)
+        
+    Returns:
+        True if every word is linked to the first by a chain of shared letters
+    """
+    # Grow the group of words connected to the first one, keeping the union of their
+    # letters as a bitmask: a word joins as soon as it shares a letter with that union,
+    # so no pairwise adjacency has to be built
+    reached = masks[0]
+    pending = masks[1:]
+    while pending:
+        unjoined = []
+        for mask in pending:
+            if mask & reached:
+                reached |= mask
+            else:
+                unjoined.append(mask)
+        # Nothing joined this pass, so the remaining words are cut off
+        if len(unjoined) == len(pending):
+            return False
+        # A word left over only joins a later pass if the union gained a letter after it was
+        # looked at, so there are at most 26 passes and the check stays linear in the words
+        pending = unjoined
+    
+    return True
+
+
+def is_plain_word(text):
+    """Check that a word or rack fits the count tables.
+    
+    Args:
+        text: Word or rack to check
+        
+    Returns:
+        True if every character is a lowercase a-z letter and no letter count can
+        overflow its packed lane
+    """
+    # Bounding the length bounds every letter's count, so the lanes never carry into their guards
+    return len(text) <= LANE_MAX and text.isascii() and text.isalpha() and text.islower()
+
+
+# Search arguments for this worker process, set once by _init_search_worker
+_search_context = None
+
+
+def _init_search_worker(context):
+    """Store the shared search arguments in a worker process.
+    
+    Args:
+        context: _iter_solutions arguments followed by max_solutions
+    """
+    global _search_context
+    _search_context = context
+
+
+def _search_root(root):
+    """Search the solutions rooted at one word, in a worker process.
+    
+    Args:
+        root: Index of the lowest-index word the solutions must contain
+        
+    Returns:
+        List of up to max_solutions solutions
+    """
+    *search_args, max_solutions = _search_context
+    return list(itertools.islice(QlessSolver._iter_solutions(*search_args, root=root), max_solutions))
+
 
 class WordList:
     """Class for handling word list operations"""
@@ -14,7 +185,7 @@ class WordList:
             file_path: Path to the word list file
             
         Returns:
-            Set of words (lowercase)
+            Set of words (lowercase) with at least three letters
         """
         if not os.path.exists(file_path):
             print(f"Error: Word list file '{file_path}' not found.")
@@ -22,8 +193,11 @@ class WordList:
             return set()
             
         try:
-            with open(file_path, 'r') as file:
-                return set(word.strip().strip('"').lower() for word in file if len(word.strip()) >= 3)
+            # Read the whole file at once and let bytes methods lowercase it and drop the
+            # surrounding quotes, instead of stripping every line in Python
+            with open(file_path, 'rb') as file:
+                data = file.read().lower().replace(b'"', b'')
+            return {word for word in data.decode().split() if len(word) >= 3}
         except Exception as e:
             print(f"Error loading word list: {e}")
             return set()
@@ -38,9 +212,36 @@ class QlessSolver:
         Args:
             word_list: Set of valid words to use for solving
         """
-        self.word_list = word_list
-        # Create a lookup structure of words by letter counts for fast filtering
-        self.word_counter_map = {word: Counter(word) for word in word_list}
+        # Only a-z have a lane in the letter tables, so skip entries like "it's" or "ice-cream"
+        self.word_list = {word for word in word_list if is_plain_word(word)}
+        # Precompute packed counts and letter masks once per word list, each kept in its own
+        # table so lookups only touch the field they need. Count vectors aren't kept: the
+        # packed counts' bytes are the counts, so the few places that need them unpack them.
+        self.word_packs = {}
+        self.word_masks = {}
+        # Group anagrams under their shared packed counts in the same pass, so each one is
+        # checked only once. Nearly every group is a single word, so they're built as tuples:
+        # a list per group would make startup mostly garbage-collector passes.
+        anagram_groups = {}
+        for word in self.word_list:
+            packed, mask = pack_letters(word)
+            self.word_packs[word] = packed
+            self.word_masks[word] = mask
+            anagram_groups[packed] = anagram_groups.get(packed, ()) + (word,)
+        # Index the groups by letter mask; a rack can only form words whose letters are a
+        # subset of its own, so lookups by submask replace a scan of the whole dictionary
+        self.mask_groups = {}
+        for packed, words in anagram_groups.items():
+            self.mask_groups.setdefault(self.word_masks[words[0]], []).append(
+                (len(words[0]), packed, words))
+        # Shortest groups first, so a lookup can stop at the first group longer than the rack
+        for groups in self.mask_groups.values():
+            groups.sort(key=lambda group: group[0])
+        # Cache word lookups per solver rather than on the class, so the cache doesn't keep
+        # every solver (and its per-word tables) alive after it's no longer used
+        self._valid_words_for = functools.lru_cache(maxsize=128)(self._find_valid_words)
+        # Finished searches by (sorted rack, max_solutions, workers), least recently used first
+        self._solution_cache = {}
         
     def get_valid_words(self, letters):
         """Find all valid words that can be formed from the given letters.
@@ -51,140 +252,398 @@ class QlessSolver:
         Returns:
             List of valid words sorted by length (descending)
         """
-        letter_counter = Counter(letters)
+        # Only a-z have a lane in the letter tables, and a lane holds at most LANE_MAX of a
+        # letter, so any other rack can't be matched against them
+        if not is_plain_word(letters):
+            return []
+        
+        # Anagrams share the packed counts and mask, so they share one cache entry
+        return list(self._valid_words_for(*pack_letters(letters), len(letters)))
+    
+    def _find_valid_words(self, rack_packed, rack_mask, rack_len):
+        """Find the valid words for a rack given by its packed counts, letter mask and length.
+        
+        Called through the per-solver cache self._valid_words_for, so repeated racks and
+        their anagrams are answered without filtering the dictionary again.
+        
+        Args:
+            rack_packed: Packed letter counts of the rack
+            rack_mask: Letter mask of the rack
+            rack_len: Number of letters in the rack
+            
+        Returns:
+            Tuple of valid words sorted by length (descending)
+        """
         valid_words = []
         
-        # Filter word_list using precomputed counters
-        for word, word_counter in self.word_counter_map.items():
-            # Fast check: Skip words with letters not in our set
-            if not (word_counter.keys() <= letter_counter.keys()):
-                continue
-                
-            # Check if we have enough of each letter
-            if all(letter_counter[letter] >= count for letter, count in word_counter.items()):
-                valid_words.append(word)
+        # Specialize counts_fit to this rack: its guarded side is the same for every word
+        guarded_rack = rack_packed | GUARD_MASK
+        guard = GUARD_MASK
+        
+        for groups in self._groups_within(rack_mask):
+            for length, packed, words in groups:
+                # Cheap length guard first; every later group is at least as long
+                if length > rack_len:
+                    break
+                # Check if we have enough of each letter
+                if (guarded_rack - packed) & guard == guard:
+                    valid_words.extend(words)
         
         # Sort words by length (descending) to optimize search
         valid_words.sort(key=len, reverse=True)
-        return valid_words
+        return tuple(valid_words)
+    
+    def _groups_within(self, rack_mask):
+        """Yield the anagram groups of every letter mask that is a subset of the rack's.
+        
+        Args:
+            rack_mask: Letter mask of the rack
+            
+        Yields:
+            Lists of (length, packed, words) groups from self.mask_groups
+        """
+        mask_groups = self.mask_groups
+        if bin(rack_mask).count('1') <= SUBMASK_WALK_LIMIT:
+            # Visit every subset of the rack's letters (4096 for 12 distinct letters)
+            submask = rack_mask
+            while submask:
+                groups = mask_groups.get(submask)
+                if groups:
+                    yield groups
+                submask = (submask - 1) & rack_mask
+        else:
+            # Too many subsets to walk, so scan the masks and reject any with a letter
+            # the rack doesn't have
+            for mask, groups in mask_groups.items():
+                if not mask & ~rack_mask:
+                    yield groups
     
-    def find_all_solutions(self, letters, max_solutions=100, timeout=5):
+    def find_all_solutions(self, letters, max_solutions=100, timeout=5, workers=1):
         """Find all valid solutions for a set of letters
         
         Args:
             letters: String of available letters
-            max_solutions: Maximum number of solutions to find
+            max_solutions: Maximum number of solutions to find (at most
+                MAX_REPORTED_SOLUTIONS are reported)
             timeout: Maximum time to spend searching (seconds)
+            workers: Number of processes to split the search across (1 searches in-process)
             
         Returns:
             List of valid solutions, where each solution is a list of words
         """
+        # Only this many solutions are reported, so don't spend the timeout searching for more
+        max_solutions = min(max_solutions, MAX_REPORTED_SOLUTIONS)
+        
+        # Every ordering of the same letters has the same solutions, so cache on the sorted rack.
+        # A search that finished before the deadline doesn't depend on the timeout
+        key = (''.join(sorted(letters)), max_solutions, workers)
+        cache = self._solution_cache
+        solutions = cache.pop(key, None)
+        if solutions is None:
+            solutions, complete = self._find_solutions(key[0], max_solutions, timeout, workers)
+            # A search cut short by the timeout may be missing solutions, so don't keep it
+            if not complete:
+                return [list(solution) for solution in solutions]
+            if len(cache) >= SOLUTION_CACHE_SIZE:
+                del cache[next(iter(cache))]  # Drop the least recently used rack
+        cache[key] = solutions  # (Re)insert as the most recently used
+        return [list(solution) for solution in solutions]
+    
+    def _find_solutions(self, letters, max_solutions, timeout, workers):
+        """Find the valid solutions for a rack given as its sorted letters.
+        
+        Args:
+            letters: Sorted string of available letters
+            max_solutions: Maximum number of solutions to find
+            timeout: Maximum time to spend searching (seconds)
+            workers: Number of processes to split the search across
+            
+        Returns:
+            Tuple of (solutions, complete): a tuple of valid solutions, where each solution
+            is a tuple of words, and whether the search finished before the timeout
+        """
         valid_words = self.get_valid_words(letters)
         
         # No valid words means it's not solvable
         if not valid_words:
-            return []
-        
-        # Precompute letter counters for each word to avoid recomputing
-        word_counters = {word: Counter(word) for word in valid_words}
+            return (), True
+        
+        # Look up precomputed letter data for each word to avoid recomputing
+        word_packs = self.word_packs
+        word_masks = self.word_masks
+        
+        # A rack letter that no valid word contains can never be placed, so don't search
+        rack_packed, rack_mask = pack_letters(letters)
+        letters_covered = 0
+        for word in valid_words:
+            letters_covered |= word_masks[word]
+        if rack_mask & ~letters_covered:
+            return (), True
+        
+        rack_counts = rack_packed.to_bytes(26, 'little')
+        
+        # Try words that use up the rack's rarest letters first (most constrained choice),
+        # then longer words; a scarce letter usually has only a few words that can place it
+        rarity = [1.0 / max(1, count) for count in rack_counts]
+        valid_words.sort(
+            key=lambda word: (sum(r * c for r, c in zip(rarity, word_packs[word].to_bytes(26, 'little'))),
+                              len(word)),
+            reverse=True)
+        
+        # Search over distinct letter bags rather than spellings: anagrams use exactly the
+        # same letters, so each bag is searched once and expanded to its spellings after.
+        # A bag is repeated once per extra spelling the rack has letters for, so solutions
+        # using two anagrams (e.g. "tar" and "rat") are still found.
+        anagrams = {}
+        for word in valid_words:
+            anagrams.setdefault(word_packs[word], []).append(word)
+        search_words = []
+        for packed, spellings in anagrams.items():
+            copies = 1
+            while copies < len(spellings) and counts_fit((copies + 1) * packed, rack_packed):
+                copies += 1
+            search_words.extend([spellings[0]] * copies)
+        
+        # Total letter supply across all searched words, used to cut branches that can't
+        # possibly cover the letters still left to place. Lanes are capped so they fit
+        # the packed layout; a capped lane still far exceeds anything the rack can use.
+        supply = [0] * 26
+        for word in search_words:
+            for i, count in enumerate(word_packs[word].to_bytes(26, 'little')):
+                supply[i] += count
+        supply_packed = pack_counts(min(have, LANE_MAX) for have in supply)
         
         # Iterative approach with an explicit stack to avoid recursion depth issues
         start_time = time.time()
         all_solutions = []
+        if counts_fit(rack_packed, supply_packed):
+            search_packs = [word_packs[word] for word in search_words]
+            search_args = (search_words, search_packs, rack_packed, len(letters), supply_packed,
+                           start_time + timeout)
+            if workers > 1:
+                bag_solutions = self._parallel_solutions(search_args, max_solutions, workers)
+            else:
+                bag_solutions = self._iter_solutions(*search_args)
+            spellings_by_word = {spellings[0]: spellings for spellings in anagrams.values()}
+            expanded = (self._expand_anagrams(solution, spellings_by_word) for solution in bag_solutions)
+            all_solutions = list(itertools.islice(itertools.chain.from_iterable(expanded), max_solutions))
+        
+        # If we didn't find any solutions with our main approach, try the simpler backup approach.
+        # A finished search has already found every pair, so this only adds anything when
+        # the search ran out of time
+        if not all_solutions and time.time() - start_time < timeout:
+            # Look for pairs of words that share a letter and together use exactly the rack
+            deadline = start_time + timeout
+            words_by_pack = {}
+            for j, word in enumerate(valid_words):
+                words_by_pack.setdefault(word_packs[word], []).append((j, word))
+            for i, word1 in enumerate(valid_words):
+                # Stop with whatever was found once the timeout is used up
+                if time.time() >= deadline:
+                    break
+                word1_mask = word_masks[word1]
+                
+                # The second word has to use exactly the letters word1 leaves; taking it from
+                # later in the list finds each pair once rather than in both orders
+                for j, word2 in words_by_pack.get(rack_packed - word_packs[word1], ()):
+                    if j > i and word1_mask & word_masks[word2]:
+                        all_solutions.append([word1, word2])
+                        
+                if len(all_solutions) >= max_solutions:
+                    del all_solutions[max_solutions:]
+                    break
+        
+        # Filter solutions to only keep valid ones (interconnected words)
+        valid_solutions = self._filter_valid_solutions(all_solutions, max_count=max_solutions)
+        
+        complete = time.time() < start_time + timeout
+        return tuple(tuple(solution) for solution in valid_solutions), complete
+    
+    def _parallel_solutions(self, search_args, max_solutions, workers):
+        """Split the search across worker processes by its first word.
+        
+        Root i covers exactly the solutions whose lowest-index word is word i, so the
+        roots never overlap and need no shared state. Results are merged in root order.
+        
+        Args:
+            search_args: Arguments for _iter_solutions, shared by every root
+            max_solutions: Maximum number of solutions to find
+            workers: Number of worker processes
+            
+        Returns:
+            List of solutions, where each solution is a list of words
+        """
+        roots = range(len(search_args[0]))
+        solutions = []
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_search_worker,
+                initargs=(search_args + (max_solutions,),)) as executor:
+            chunksize = max(1, len(roots) // (workers * 4))
+            for root_solutions in executor.map(_search_root, roots, chunksize=chunksize):
+                solutions.extend(root_solutions)
+                if len(solutions) >= max_solutions:
+                    # Enough found; drop the roots that haven't started yet
+                    executor.shutdown(cancel_futures=True)
+                    break
+        return solutions[:max_solutions]
+    
+    @staticmethod
+    def _iter_solutions(valid_words, word_packs, rack_packed, rack_len, supply_packed, deadline, root=None):
+        """Run the exhaustive search for word sets that use up every letter.
         
-        # Stack entries: (words_to_try, remaining_letters, current_solution, skip_index)
-        # skip_index tells us which word in words_to_try we're currently considering
-        stack = [(valid_words, letters, [], 0)]
+        This is the hot loop, so it works on word indices and packed ints only, with
+        every lookup it needs bound to a local name. Solutions are yielded as they are
+        found, so the caller decides how many to take.
         
-        while stack and len(all_solutions) < max_solutions and time.time() - start_time < timeout:
-            words, remaining, solution, skip_idx = stack.pop()
+        Args:
+            valid_words: Words that can be formed from the rack, in search order. A word
+                may be repeated; a later copy is only used once the earlier one is
+            word_packs: Packed letter counts of each word in valid_words
+            rack_packed: Packed letter counts of the rack
+            rack_len: Number of letters in the rack
+            supply_packed: Packed (capped) letter counts summed over valid_words
+            deadline: time.time() value after which the search stops
+            root: If given, only search solutions whose lowest-index word is valid_words[root]
+            
+        Yields:
+            Solutions, where each solution is a list of words
+        """
+        word_lens = [len(word) for word in valid_words]
+        shortest = min(word_lens, default=0)
+        # Bit of the previous copy of a repeated word, so copies are only used in order and
+        # swapping two identical words never yields a second, equivalent branch
+        twin_bits = [1 << (i - 1) if i and valid_words[i - 1] == word else 0
+                     for i, word in enumerate(valid_words)]
+        word_presence = [(packed + LANE_FILL) & GUARD_MASK for packed in word_packs]
+        guard = GUARD_MASK
+        fill = LANE_FILL
+        now = time.time
+        nodes = 0
+        
+        # Search states already pushed, keyed on the available bitmask alone: the words used
+        # so far are exactly the cleared bits, so it also fixes the remaining letters. Using
+        # the same words in a different order reaches the same state, so it is explored once.
+        # To bound memory only the latest two windows of states are kept; a state forgotten
+        # that way may be searched again, so found solutions are also checked for repeats.
+        seen_states = set()
+        older_states = set()
+        found = set()
+        
+        # Stack entries: (to_try_bitmask, available_bitmask, remaining_packed, remaining_len,
+        #                 supply_packed, used_lanes)
+        # All but the bitmasks are carried forward incrementally as words are placed;
+        # used_lanes has the guard bit set in the lane of every letter placed so far
+        # Bit i of a mask stands for valid_words[i]; the lowest bit of to_try is the word
+        # we're currently considering, and the cleared bits below it were already tried.
+        # The words placed are the bits of unplaced cleared in available, so the current
+        # solution never has to be copied onto the stack
+        all_words = (1 << len(valid_words)) - 1
+        if root is None:
+            unplaced = all_words
+            stack = [(all_words, all_words, rack_packed, rack_len, supply_packed, 0)]
+        else:
+            # Start with the root word placed and every earlier word unavailable. A later
+            # copy of a repeated word can't lead, since its earlier copy would have to be used
+            root_packed = word_packs[root]
+            if twin_bits[root] or not counts_fit(root_packed, rack_packed):
+                return
+            unplaced = all_words & ~((1 << root) - 1)
+            available = unplaced ^ (1 << root)
+            stack = [(available, available, rack_packed - root_packed, rack_len - word_lens[root],
+                      supply_packed - root_packed, word_presence[root])]
+        pop = stack.pop
+        push = stack.append
+        
+        while stack:
+            # Reading the clock costs more than a node, so only check it every so often
+            nodes += 1
+            if not nodes & 0x3ff and now() >= deadline:
+                return
+            
+            to_try, available, remaining, remaining_len, supply, used_lanes = pop()
             
             # No letters left means we found a solution
             if not remaining:
-                all_solutions.append(solution)
+                # The per-word prune can't see a solution split into groups that each share
+                # letters internally, so check the whole solution before it takes a slot.
+                # A lone word isn't kept as a solution either, so it doesn't take one
+                used = unplaced ^ available
+                if used not in found:
+                    solution = []
+                    while used:
+                        placed = used & -used
+                        solution.append(placed.bit_length() - 1)
+                        used ^= placed
+                    if len(solution) > 1 and masks_connected([word_presence[i] for i in solution]):
+                        found.add(unplaced ^ available)
+                        yield [valid_words[i] for i in solution]
                 continue
                 
-            # No words left or tried all words but still have letters, this path fails
-            if not words or skip_idx >= len(words):
+            # Find the next word that fits the remaining letters, passing over the ones
+            # that don't without stacking a frame for each
+            while to_try:
+                bit = to_try & -to_try
+                to_try ^= bit
+                i = bit.bit_length() - 1
+                word_packed = word_packs[i]
+                if (word_lens[i] <= remaining_len and not available & twin_bits[i]
+                        and ((remaining | guard) - word_packed) & guard == guard):
+                    break
+            else:
+                # Tried all words but still have letters, this path fails
                 continue
-                
-            # Get the current word we're considering
-            word = words[skip_idx]
             
             # Option 1: Skip this word and try the next one
-            stack.append((words, remaining, solution, skip_idx + 1))
+            push((to_try, available, remaining, remaining_len, supply, used_lanes))
             
-            # Option 2: Use this word if possible
-            if len(word) <= len(remaining):
-                # Check if we can use this word
-                remaining_counter = Counter(remaining)
-                word_counter = word_counters[word]
-                
-                can_use = True
-                for letter, count in word_counter.items():
-                    if remaining_counter[letter] < count:
-                        can_use = False
-                        break
-                
-                if can_use:
-                    # Remove letters used by this word
-                    for letter, count in word_counter.items():
-                        remaining_counter[letter] -= count
-                    
-                    # Create new remaining letters string
-                    updated_remaining = ''.join(remaining_counter.elements())
-                    
-                    # Create new word list without the current word
-                    remaining_words = words[:skip_idx] + words[skip_idx+1:]
-                    
-                    # Add to stack - try with this word
-                    new_solution = solution + [word]
-                    stack.append((remaining_words, updated_remaining, new_solution, 0))
-        
-        # If we didn't find any solutions with our main approach, try the simpler backup approach
-        if not all_solutions and time.time() - start_time < timeout:
-            # Try a simple approach focused on finding pairs of words
-            for i, word1 in enumerate(valid_words):
-                word1_counter = word_counters[word1]
-                
-                # For each word, find other words that can be formed with remaining letters
-                remaining_letters = ''.join((Counter(letters) - word1_counter).elements())
-                
-                if not remaining_letters:  # If word1 uses all letters
-                    # A single word that uses all letters is a valid solution if it's long enough
-                    if len(word1) >= len(letters) * 0.75:  # Heuristic: word should use most letters
-                        all_solutions.append([word1])
-                        continue
-                
-                # Look for a second word that uses remaining letters and shares letters with word1
-                for word2 in valid_words:
-                    if word2 == word1:
-                        continue
-                        
-                    # Check if words share any letters
-                    if not set(word1) & set(word2):
-                        continue
-                    
-                    # Check if word2 can be formed from remaining letters plus some from word1
-                    # This allows for valid interlocking words
-                    word2_counter = word_counters[word2]
-                    combined_counter = word1_counter + Counter(remaining_letters)
-                    
-                    if all(combined_counter[letter] >= count for letter, count in word2_counter.items()):
-                        # Check if together they use all or nearly all letters
-                        combined_used = sum((word1_counter | word2_counter).values())
-                        if combined_used >= len(letters) * 0.9:  # Allow for slight inefficiency
-                            all_solutions.append([word1, word2])
-                            if len(all_solutions) >= max_solutions:
-                                break
-                                
-                if len(all_solutions) >= max_solutions:
-                    break
-        
-        # Filter solutions to only keep valid ones (interconnected words)
-        valid_solutions = self._filter_valid_solutions(all_solutions, max_count=20)
+            # Option 2: Use this word, removing the letters it uses
+            # Prune straight away if what's left is too short for any word to use it up
+            updated_len = remaining_len - word_lens[i]
+            if updated_len and updated_len < shortest:
+                continue
+            updated_remaining = remaining - word_packed
+            updated_available = available ^ bit
+            
+            # Skip states we've already reached through another word order
+            if updated_available in seen_states or (older_states and updated_available in older_states):
+                continue
+            seen_states.add(updated_available)
+            if len(seen_states) >= SEEN_STATES_LIMIT:
+                older_states = seen_states
+                seen_states = set()
+            
+            # A word sharing no letter with the words already chosen or with the letters still
+            # to place can never be connected to the rest of the solution, so prune it here
+            # rather than generating solutions that get filtered out afterwards
+            presence = word_presence[i]
+            if used_lanes and not presence & (used_lanes | ((updated_remaining + fill) & guard)):
+                continue
+            
+            # Prune if the words still available can't supply the letters we need
+            updated_supply = supply - word_packed
+            if ((updated_supply | guard) - updated_remaining) & guard != guard:
+                continue
+            
+            # Try with this word, restarting from the first word still available
+            push((updated_available, updated_available, updated_remaining,
+                  updated_len, updated_supply, used_lanes | presence))
+    
+    @staticmethod
+    def _expand_anagrams(solution, spellings_by_word):
+        """Expand a solution over letter bags into solutions over actual spellings.
         
-        return valid_solutions
+        Args:
+            solution: List of representative words, one per bag used (bags may repeat)
+            spellings_by_word: Dictionary mapping each representative to its anagrams
+            
+        Yields:
+            Each solution obtained by choosing distinct spellings for every bag
+        """
+        bags = list(dict.fromkeys(solution))
+        choices = [itertools.combinations(spellings_by_word[word], solution.count(word)) for word in bags]
+        for picks in itertools.product(*choices):
+            chosen = {word: iter(spellings) for word, spellings in zip(bags, picks)}
+            yield [next(chosen[word]) for word in solution]
     
     def _filter_valid_solutions(self, all_solutions, max_count=10):
         """Filter solutions to only keep those that are valid for Q-Less.
@@ -198,30 +657,28 @@ class QlessSolver:
         """
         valid_solutions = []
         
-        # Pre-compute letter sets for each word for faster comparisons
-        solution_letter_sets = {}
+        # Use the precomputed letter masks for each word for faster comparisons
+        word_masks = self.word_masks
+        solution_letter_masks = {}
         
         for solution in all_solutions:
             if len(solution) <= 1:
                 continue  # Skip solutions with only one word
             
-            # Cache letter sets for words in this solution
+            # Cache letter masks for words in this solution
             for word in solution:
-                if word not in solution_letter_sets:
-                    solution_letter_sets[word] = set(word)
+                if word not in solution_letter_masks:
+                    solution_letter_masks[word] = word_masks[word]
                     
             # Special fast path for two-word solutions - just check if they share any letters
             if len(solution) == 2:
                 word1, word2 = solution
-                word1_letters = solution_letter_sets[word1]
-                word2_letters = solution_letter_sets[word2]
-                
-                if word1_letters & word2_letters:  # If words share any letters
-                    valid_solutions.append(solution)
-                    continue
-                    
-            # For more complex solutions, check graph connectivity
-            if self._check_solution_connectivity(solution, solution_letter_sets):
+                connected = solution_letter_masks[word1] & solution_letter_masks[word2]
+            else:
+                # For more complex solutions, check graph connectivity
+                connected = self._check_solution_connectivity(solution, solution_letter_masks)
+            
+            if connected:
                 valid_solutions.append(solution)
                 
                 # Limit the number of valid solutions we store
@@ -230,41 +687,19 @@ class QlessSolver:
         
         return valid_solutions
     
-    def _check_solution_connectivity(self, solution, letter_sets=None):
+    def _check_solution_connectivity(self, solution, letter_masks=None):
         """Check if all words in a solution are connected through shared letters.
         
         Args:
             solution: List of words
-            letter_sets: Precomputed letter sets for words (optimization)
+            letter_masks: Precomputed letter masks for words (optimization)
             
         Returns:
             True if all words are connected, False otherwise
         """
-        # Create a graph of connections
-        if not letter_sets:
-            letter_sets = {word: set(word) for word in solution}
-            
-        connections = defaultdict(set)
-        for i, word1 in enumerate(solution):
-            word1_letters = letter_sets[word1]
-            for word2 in solution[i+1:]:
-                word2_letters = letter_sets[word2]
-                if word1_letters & word2_letters:  # If words share any letters
-                    connections[word1].add(word2)
-                    connections[word2].add(word1)
-        
-        # Check if all words are connected using BFS
-        visited = set()
-        queue = deque([solution[0]])  # Start with the first word (using deque for better performance)
-        while queue:
-            word = queue.popleft()
-            visited.add(word)
-            for connected_word in connections[word]:
-                if connected_word not in visited:
-                    queue.append(connected_word)
-        
-        # If we've visited all words, they're connected
-        return len(visited) == len(solution)
+        if not letter_masks:
+            letter_masks = {word: letter_mask(word) for word in solution}
+        return masks_connected([letter_masks[word] for word in solution])
 
 
 class QlessVisualizer:
@@ -285,39 +720,76 @@ class QlessVisualizer:
         print("\nPossible arrangement:")
         print("--------------------------")
         
+        # Index the letters once and share it between the layout helpers
+        letter_index = QlessVisualizer._build_letter_index(solution)
+        
         # Choose appropriate visualization based on solution size
         if len(solution) <= 3:
             # For small solutions, use the specialized methods
             if len(solution) == 2:
                 QlessVisualizer._visualize_two_word_solution(solution)
             elif len(solution) == 3:
-                QlessVisualizer._visualize_three_word_solution(solution)
+                QlessVisualizer._visualize_three_word_solution(solution, letter_index)
             print("--------------------------")
         else:
             # For larger solutions, use the connection diagram
-            QlessVisualizer._print_word_connections(solution)
+            QlessVisualizer._print_word_connections(solution, letter_index)
+    
+    @staticmethod
+    def _build_letter_index(solution):
+        """Map each letter to the indices of the words in a solution that contain it.
+        
+        Args:
+            solution: List of words
+            
+        Returns:
+            Dictionary mapping letters to ascending lists of word indices
+        """
+        letter_index = defaultdict(list)
+        for i, word in enumerate(solution):
+            for letter in mask_letters(letter_mask(word)):
+                letter_index[letter].append(i)
+        return letter_index
+    
+    @staticmethod
+    def _shared_letters_by_pair(solution, letter_index=None):
+        """Find the letters each pair of words shares, using the letter index.
+        
+        Only pairs that really share a letter are visited, instead of every pair of words.
+        
+        Args:
+            solution: List of words
+            letter_index: Precomputed result of _build_letter_index (optimization)
+            
+        Returns:
+            Dictionary mapping index pairs (i, j) with i < j to their shared letters in
+            alphabetical order, with the pairs in ascending order
+        """
+        if letter_index is None:
+            letter_index = QlessVisualizer._build_letter_index(solution)
+        shared = defaultdict(list)
+        for letter in sorted(letter_index):
+            for pair in itertools.combinations(letter_index[letter], 2):
+                shared[pair].append(letter)
+        return dict(sorted(shared.items()))
         
     @staticmethod
-    def _find_word_connections(solution):
+    def _find_word_connections(solution, letter_index=None):
         """Find all connections (shared letters) between words.
         
         Args:
             solution: List of words
+            letter_index: Precomputed result of _build_letter_index (optimization)
             
         Returns:
             Dictionary mapping words to lists of connections
         """
         connections = defaultdict(list)
-        # Pre-compute word letter sets
-        letter_sets = {word: set(word) for word in solution}
-        
-        for i, word1 in enumerate(solution):
-            for j, word2 in enumerate(solution[i+1:], i+1):
-                shared = letter_sets[word1] & letter_sets[word2]
-                if shared:
-                    for letter in shared:
-                        connections[word1].append((word2, letter))
-                        connections[word2].append((word1, letter))
+        for (i, j), shared in QlessVisualizer._shared_letters_by_pair(solution, letter_index).items():
+            word1, word2 = solution[i], solution[j]
+            for letter in shared:
+                connections[word1].append((word2, letter))
+                connections[word2].append((word1, letter))
         
         return connections
     
@@ -330,7 +802,7 @@ class QlessVisualizer:
         """
         word1, word2 = solution
         # Find all shared letters
-        shared_letters = set(word1) & set(word2)
+        shared_letters = tuple(mask_letters(letter_mask(word1) & letter_mask(word2)))
         if not shared_letters:
             # If no shared letters (shouldn't happen), just print the words
             print(word1)
@@ -361,7 +833,7 @@ class QlessVisualizer:
         """Choose the best shared letter for visualization.
         
         Args:
-            shared_letters: Set of shared letters
+            shared_letters: Collection of shared letters
             
         Returns:
             The chosen shared letter
@@ -405,26 +877,24 @@ class QlessVisualizer:
         return positions[0]
     
     @staticmethod
-    def _visualize_three_word_solution(solution):
+    def _visualize_three_word_solution(solution, letter_index=None):
         """Create a visualization for a three-word solution.
         
         Args:
             solution: List of three words
+            letter_index: Precomputed result of _build_letter_index (optimization)
         """
-        # Find all connections between the words
+        # Find all connections between the words, in both directions
         word_connections = defaultdict(list)
-        # Precompute word letter sets for faster operation
-        letter_sets = {word: set(word) for word in solution}
+        # Precompute each word's letter -> first position map
+        first_positions = [QlessVisualizer._first_letter_positions(word) for word in solution]
         
-        for word1 in solution:
-            for word2 in solution:
-                if word1 != word2:
-                    shared = letter_sets[word1] & letter_sets[word2]
-                    if shared:
-                        for letter in shared:
-                            pos1 = word1.find(letter)
-                            pos2 = word2.find(letter)
-                            word_connections[word1].append((word2, letter, pos1, pos2))
+        for (i, j), shared in QlessVisualizer._shared_letters_by_pair(solution, letter_index).items():
+            word1, word2 = solution[i], solution[j]
+            positions1, positions2 = first_positions[i], first_positions[j]
+            for letter in shared:
+                word_connections[word1].append((word2, letter, positions1[letter], positions2[letter]))
+                word_connections[word2].append((word1, letter, positions2[letter], positions1[letter]))
         
         # Try to find a word that connects to both others
         central_candidates = []
@@ -446,6 +916,21 @@ class QlessVisualizer:
                 # Fallback to descriptive approach
                 QlessVisualizer._visualize_descriptive(solution, word_connections)
     
+    @staticmethod
+    def _first_letter_positions(word):
+        """Map each letter of a word to the index of its first occurrence.
+        
+        Args:
+            word: The word to index
+            
+        Returns:
+            Dictionary mapping letters to positions
+        """
+        positions = {}
+        for i, letter in enumerate(word):
+            positions.setdefault(letter, i)
+        return positions
+    
     @staticmethod
     def _find_word_chain(solution, word_connections):
         """Find a chain of words where each connects to the next.
@@ -525,26 +1010,21 @@ class QlessVisualizer:
     def _create_central_pattern_grid(central_word, connections):
         """Create and print a grid for a central pattern visualization."""
         # Calculate horizontal span
-        max_h = len(central_word) - 1
+        width = len(central_word)
         
-        # Place all vertical words
-        v_word_grids = {}
+        # Determine overall vertical bounds, relative to the central word's row
+        min_v = 0
+        max_v = 0
+        for v_word, _, _, v_pos in connections:
+            min_v = min(min_v, -v_pos)
+            max_v = max(max_v, len(v_word) - v_pos - 1)
         
+        # Place all vertical words into one flat grid indexed as row * width + col
+        grid = bytearray(b' ' * (width * (max_v - min_v + 1)))
         for v_word, _, c_pos, v_pos in connections:
-            # Calculate vertical bounds
-            v_min = -v_pos
-            v_max = len(v_word) - v_pos - 1
-            
-            # Create a grid for this vertical word
-            v_grid = [' '] * (v_max - v_min + 1)
-            for i in range(len(v_word)):
-                v_grid[i - v_pos - v_min] = v_word[i]
-            
-            v_word_grids[v_word] = (v_grid, v_min, v_max, c_pos)
-        
-        # Determine overall vertical bounds
-        min_v = min([v_min for _, v_min, _, _ in v_word_grids.values()])
-        max_v = max([v_max for _, _, v_max, _ in v_word_grids.values()])
+            top = -v_pos - min_v
+            for i, letter in enumerate(v_word.encode()):
+                grid[(top + i) * width + c_pos] = letter
         
         # Create the final grid
         for v_idx in range(min_v, max_v + 1):
@@ -552,13 +1032,8 @@ class QlessVisualizer:
                 # This is the central word row
                 print(central_word)
             else:
-                # Check which vertical words have a letter in this row
-                row = [' '] * (max_h + 1)
-                for v_word, (v_grid, v_min, v_max, h_pos) in v_word_grids.items():
-                    grid_idx = v_idx - v_min
-                    if 0 <= grid_idx < len(v_grid):
-                        row[h_pos] = v_grid[grid_idx]
-                print(''.join(row))
+                start = (v_idx - min_v) * width
+                print(grid[start:start + width].decode())
     
     @staticmethod
     def _visualize_chain_pattern(chain, word_connections):
@@ -617,19 +1092,16 @@ class QlessVisualizer:
                     word_pairs_shown.add(pair_key)
     
     @staticmethod
-    def _print_word_connections(solution):
+    def _print_word_connections(solution, letter_index=None):
         """Print a simplified diagram showing how words connect."""
-        # Create a graph of word connections
-        connections = defaultdict(list)
-        # Pre-compute letter sets for better performance
-        letter_sets = {word: set(word) for word in solution}
-        
-        for i, word1 in enumerate(solution):
-            for word2 in solution[i+1:]:
-                shared = letter_sets[word1] & letter_sets[word2]
-                if shared:
-                    connections[word1].append((word2, ", ".join(shared)))
-                    connections[word2].append((word1, ", ".join(shared)))
+        # Create a graph of word connections, grouping the shared letters per word pair
+        connections = {}
+        for word, links in QlessVisualizer._find_word_connections(solution, letter_index).items():
+            shared_by_word = {}
+            for connected_word, letter in links:
+                shared_by_word.setdefault(connected_word, []).append(letter)
+            connections[word] = [(connected_word, ", ".join(shared))
+                                 for connected_word, shared in shared_by_word.items()]
         
         # List all the words in the solution
         for word in solution:
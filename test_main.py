@@ -0,0 +1,48 @@
+import unittest
+
+from main import QlessSolver
+
+
+class QlessSolverTest(unittest.TestCase):
+    def setUp(self):
+        self.solver = QlessSolver({"cat", "act", "tab", "bat", "sum", "rest"})
+
+    def test_non_ascii_letters_are_not_solvable(self):
+        # isalpha() accepts accented letters, which have no lane in the count tables
+        self.assertEqual(self.solver.get_valid_words("résuméabcdef"), [])
+        self.assertEqual(self.solver.find_all_solutions("résuméabcdef"), [])
+
+    def test_uppercase_letters_are_not_solvable(self):
+        self.assertEqual(self.solver.get_valid_words("CAT"), [])
+
+    def test_racks_too_long_for_the_packed_lanes_are_not_solvable(self):
+        self.assertEqual(self.solver.get_valid_words("a" * 128 + "b"), [])
+        self.assertEqual(self.solver.find_all_solutions("t" * 256 + "ab"), [])
+
+    def test_word_list_entries_outside_a_to_z_are_skipped(self):
+        solver = QlessSolver({"cat", "it's", "ice-cream", "caf`", "café"})
+        self.assertEqual(solver.get_valid_words("catsicream"), ["cat"])
+        self.assertEqual(solver.get_valid_words("cafz"), [])
+
+    def test_pairs_that_do_not_use_the_rack_exactly_are_not_solutions(self):
+        # Together these need a second d, e, n, o, s and w, and leave an r unused
+        solver = QlessSolver({"spelldown", "drowners"})
+        self.assertEqual(solver.find_all_solutions("drolrlrwesnp"), [])
+
+    def test_parallel_search_finds_the_same_solutions(self):
+        serial = self.solver.find_all_solutions("tabrestcat", workers=1)
+        parallel = self.solver.find_all_solutions("tabrestcat", workers=4)
+        self.assertEqual(len(serial), 4)
+        self.assertEqual({tuple(sorted(s)) for s in parallel},
+                         {tuple(sorted(s)) for s in serial})
+
+    def test_timed_out_searches_are_not_cached(self):
+        # The deadline has passed by the time the search ends, so it counts as cut short
+        self.solver.find_all_solutions("tabrestcat", timeout=0)
+        self.assertEqual(self.solver._solution_cache, {})
+        self.solver.find_all_solutions("tabrestcat")
+        self.assertEqual(len(self.solver._solution_cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()